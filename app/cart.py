@@ -1,16 +1,18 @@
 from .catalog import CATALOG
+from .cart_store import CART_STORE
 
-CART = {}
+# İstemci başına sepetler (cart_id → {productId: adet}), kalıcılık katmanı takip eder
+CARTS = {}
 
 def format_price(amount: float) -> str:
     return f"{amount:,.2f} ₺".replace(",", ".")
 
-def build_cart_summary():
+def build_cart_summary(cart: dict):
     items = []
     total_amount = 0
     total_qty = 0
 
-    for pid, qty in CART.items():
+    for pid, qty in cart.items():
         product = next((p for p in CATALOG if p["id"] == pid), None)
         if not product:
             continue
@@ -35,3 +37,93 @@ def build_cart_summary():
         "totalAmountFormatted": format_price(total_amount),
         "totalQuantity": total_qty
     }
+
+
+# ============================================================
+# Sepet işlemleri (MCP tool'ları, REST API ve cluster RPC ortak kullanır)
+# ============================================================
+
+def add_item(cart_id: str, productId: str) -> dict:
+    product = next((p for p in CATALOG if p["id"] == productId), None)
+    if not product:
+        return {"success": False, "message": "Ürün bulunamadı"}
+
+    # Sepet sadece ilk mutasyonda oluşturulur
+    cart = CARTS.setdefault(cart_id, {})
+    cart[productId] = cart.get(productId, 0) + 1
+    CART_STORE.mark_dirty(cart_id)
+    summary = build_cart_summary(cart)
+
+    return {
+        "success": True,
+        "message": f"{product['name']} sepete eklendi",
+        "cart": summary
+    }
+
+def remove_item(cart_id: str, productId: str) -> dict:
+    cart = CARTS.get(cart_id, {})
+    if productId not in cart:
+        return {"success": False, "message": "Ürün sepette değil"}
+
+    del cart[productId]
+    if not cart:
+        del CARTS[cart_id]
+    CART_STORE.mark_dirty(cart_id)
+    summary = build_cart_summary(cart)
+
+    return {
+        "success": True,
+        "message": "Ürün sepetten çıkarıldı",
+        "cart": summary
+    }
+
+def get_cart(cart_id: str) -> dict:
+    cart = CARTS.get(cart_id, {})
+    summary = build_cart_summary(cart)
+
+    if not cart:
+        return {
+            "isEmpty": True,
+            "message": "Sepetiniz boş",
+            "cart": summary
+        }
+
+    return {
+        "isEmpty": False,
+        "message": f"Sepetinizde {summary['totalQuantity']} ürün var",
+        "cart": summary
+    }
+
+def checkout(cart_id: str) -> dict:
+    cart = CARTS.get(cart_id, {})
+    summary = build_cart_summary(cart)
+
+    if not cart:
+        return {
+            "success": False,
+            "message": "Sepet boş, sipariş verilemez"
+        }
+
+    order_summary = {
+        "orderId": f"ORD-{hash(str(cart)) % 10000:04d}",
+        "items": summary["items"],
+        "total": summary["totalAmountFormatted"],
+        "itemCount": summary["totalQuantity"]
+    }
+
+    del CARTS[cart_id]
+    CART_STORE.mark_dirty(cart_id)
+
+    return {
+        "success": True,
+        "message": f"Siparişiniz alındı! Toplam: {order_summary['total']}",
+        "order": order_summary
+    }
+
+
+CART_OPS = {
+    "add_item": add_item,
+    "remove_item": remove_item,
+    "get_cart": get_cart,
+    "checkout": checkout,
+}
@@ -0,0 +1,205 @@
+# app/cart_store.py
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from .config import CART_DB_PATH, CART_FLUSH_INTERVAL, CART_FLUSH_BATCH, CART_WRITE_BEHIND
+
+logger = logging.getLogger(__name__)
+
+
+class CartStore:
+    """
+    Sepetler için write-behind kalıcılık katmanı.
+
+    - Mutasyonlar bellekte hemen uygulanır, burada sadece "kirli" olarak işaretlenir
+    - Aynı sepete gelen ardışık değişiklikler tek bir yazıma indirgenir
+    - Arka plandaki asyncio task kirli sepetleri tek transaction'da SQLite'a yazar
+    - Gecikme en fazla `flush_interval` saniyedir; `flush_batch` kadar kirli sepet
+      birikirse beklemeden yazılır
+    - Başlangıçta `load()` son commit edilmiş durumu geri yükler
+
+    `write_behind=False` ise her mutasyon çağrı içinde senkron olarak diske yazılır
+    (karşılaştırma ve hata ayıklama için).
+
+    Her sepet satırı monoton artan bir versiyon taşır; eski bir snapshot diskteki
+    daha yeni bir durumun üzerine yazamaz. Tüm yazımlar tek bir writer thread'inde,
+    tek bir SQLite bağlantısı üzerinden yapılır.
+    """
+
+    def __init__(self, path: str, flush_interval: float, flush_batch: int, write_behind: bool = True):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.write_behind = write_behind
+
+        self._carts: Dict[str, Dict[str, int]] = {}
+        self._versions: Dict[str, int] = {}
+        self._dirty: Set[str] = set()
+        self._lock = asyncio.Lock()
+        self._stopping = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # sqlite3 bağlantısı thread'e bağlı; writer tek thread'de yaşar
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # --------------------------------------------------------
+    # SQLite yardımcıları (writer thread içinde çalışır)
+    # --------------------------------------------------------
+    def _create_schema(self) -> None:
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS carts ("
+                " cart_id TEXT PRIMARY KEY,"
+                " items TEXT NOT NULL,"
+                " version INTEGER NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+        finally:
+            conn.close()
+
+    def _write_batch(self, batch: Dict[str, Tuple[Dict[str, int], int]]) -> None:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO carts (cart_id, items, version, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(cart_id) DO UPDATE SET"
+                " items = excluded.items, version = excluded.version, updated_at = excluded.updated_at"
+                " WHERE excluded.version > carts.version",
+                [
+                    (cart_id, json.dumps(items), version, now)
+                    for cart_id, (items, version) in batch.items()
+                ],
+            )
+
+    def _close_conn(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _writer(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cart-store")
+        return self._executor
+
+    def _snapshot(self, cart_ids) -> Dict[str, Tuple[Dict[str, int], int]]:
+        return {
+            cart_id: (dict(self._carts.get(cart_id, {})), self._versions[cart_id])
+            for cart_id in cart_ids
+        }
+
+    # --------------------------------------------------------
+    # Public API
+    # --------------------------------------------------------
+    def load(
+        self,
+        carts: Dict[str, Dict[str, int]],
+        owns: Optional[Callable[[str], bool]] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Şemayı oluşturur, kayıtlı sepetleri `carts` sözlüğüne geri yükler ve
+        takibe alır. Var olan sepet nesneleri yerinde güncellenir; mutasyonlar bu
+        sözlük üzerinde yapılmalıdır. Boş sepetler belleğe alınmaz.
+
+        `owns` verilirse sadece `owns(cart_id)` True dönen sepetler yüklenir
+        (cluster modunda paylaşılan store'dan bu node'un payı).
+        """
+        self._create_schema()
+
+        conn = sqlite3.connect(self.path)
+        try:
+            rows = conn.execute("SELECT cart_id, items, version FROM carts").fetchall()
+        finally:
+            conn.close()
+
+        for cart_id, items, version in rows:
+            if owns and not owns(cart_id):
+                continue
+            self._versions[cart_id] = version
+            items = json.loads(items)
+            if items:
+                cart = carts.setdefault(cart_id, {})
+                cart.clear()
+                cart.update(items)
+
+        self._carts = carts
+        return carts
+
+    def mark_dirty(self, cart_id: str) -> None:
+        """Sepet değişti; bir sonraki flush'ta yazılacak. Disk beklemez."""
+        self._versions[cart_id] = self._versions.get(cart_id, 0) + 1
+
+        if not self.write_behind:
+            # Senkron mod: yazım bitene kadar çağıran bekler
+            self._writer().submit(self._write_batch, self._snapshot([cart_id])).result()
+            return
+
+        self._dirty.add(cart_id)
+        if self._wakeup and len(self._dirty) >= self.flush_batch:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Kirli sepetlerin o anki anlık görüntüsünü diske yazar."""
+        # Yazımlar sıralı: eski bir snapshot yenisinden sonra commit edilemez
+        async with self._lock:
+            if not self._dirty:
+                return
+
+            # Snapshot event loop içinde alınır, yazım writer thread'inde yapılır
+            batch = self._snapshot(self._dirty)
+            self._dirty.clear()
+
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(self._writer(), self._write_batch, batch)
+            except Exception:
+                logger.exception("Sepet flush başarısız, tekrar denenecek")
+                self._dirty.update(batch)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self) -> None:
+        if self._task or not self.write_behind:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Arka plan task'ını durdurur ve kalan değişiklikleri yazar.
+        Task iptal edilmez; devam eden flush bitene kadar beklenir.
+        """
+        if self._task:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+        if self._executor:
+            self._executor.submit(self._close_conn).result()
+            self._executor.shutdown()
+            self._executor = None
+
+
+CART_STORE = CartStore(CART_DB_PATH, CART_FLUSH_INTERVAL, CART_FLUSH_BATCH, CART_WRITE_BEHIND)
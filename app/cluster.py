@@ -0,0 +1,356 @@
+# app/cluster.py
+import bisect
+import contextvars
+import hashlib
+import hmac
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.background import BackgroundTask
+from starlette.datastructures import Headers
+from starlette.responses import Response, StreamingResponse
+
+from .cart import CART_OPS
+from .config import (
+    CLUSTER_NODES,
+    CLUSTER_SELF,
+    CLUSTER_SECRET,
+    CLUSTER_VNODES,
+    CLUSTER_MAX_CONNECTIONS,
+    TRUSTED_PROXY_HOPS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Node'lar arası isteklerde kullanılan header'lar
+FORWARDED_HEADER = "x-cluster-forwarded"
+SECRET_HEADER = "x-cluster-secret"
+CLIENT_KEY_HEADER = "x-cluster-client-key"
+
+# Proxy sırasında taşınmaması gereken hop-by-hop header'lar
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "host", "content-length",
+}
+
+# Dışarıdan gelen isteklerde asla güvenilmeyen iç header'lar
+INTERNAL_HEADERS = {FORWARDED_HEADER, SECRET_HEADER, CLIENT_KEY_HEADER}
+
+# İstemciye göre yönlendirilen path'ler (MCP oturumları + REST sepet API'si)
+ROUTED_PREFIXES = ("/mcp", "/api/cart", "/api/checkout")
+
+# O anki isteğin istemci key'i (session_key); middleware set eder
+CLIENT_KEY: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("cluster_client_key", default=None)
+
+
+class ClusterError(Exception):
+    """Sahip node'a ulaşılamadı veya node hata döndü."""
+
+
+# ============================================================
+# Partition key'leri
+# ============================================================
+
+def token_key(token: str) -> str:
+    return f"token:{token}"
+
+
+def session_key(headers: Headers, client_host: str = "", trusted_hops: int = TRUSTED_PROXY_HOPS) -> str:
+    """
+    İstemcinin key'i (MCP oturumu ve sepet).
+
+    GET /mcp/sse ve POST /mcp/messages aynı node'a düşmeli. İkisinde de ortak olan
+    bilgi bearer token'dır; token yoksa istemci IP'sine düşülür.
+
+    IP, soketin karşı ucundan (`client_host`) alınır. Önde `trusted_hops` adet
+    güvenilir proxy varsa X-Forwarded-For'un sağdan o kadarıncı girdisi kullanılır;
+    soldaki girdiler istemci tarafından yazılabildiği için asla kullanılmaz.
+    """
+    auth = headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        return token_key(auth[7:].strip())
+
+    forwarded_for = headers.get("x-forwarded-for")
+    if trusted_hops and forwarded_for:
+        hops = [h.strip() for h in forwarded_for.split(",")]
+        if len(hops) >= trusted_hops:
+            client_host = hops[-trusted_hops]
+    return f"ip:{client_host}"
+
+
+def cart_id_for(client_key: str) -> str:
+    """İstemci key'inden sepet id'si; token'ın kendisi diske yazılmasın diye hash'lenir."""
+    return hashlib.sha256(client_key.encode("utf-8")).hexdigest()[:32]
+
+
+def cart_key(cart_id: str) -> str:
+    """Sepetin ring key'i. Ring'de sadece sepet id'si kullanıldığı için diskteki her
+    satırın sahibi de hesaplanabilir (bkz. CartStore.load)."""
+    return f"cart:{cart_id}"
+
+
+def client_ring_key(client_key: str) -> str:
+    """İstemcinin (oturum + sepet) ring key'i."""
+    return cart_key(cart_id_for(client_key))
+
+
+# ============================================================
+# Consistent hash ring
+# ============================================================
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Sanal noktalı consistent hash ring.
+    Node eklenip çıkarıldığında key'lerin sadece ~1/N'i sahip değiştirir.
+    """
+
+    def __init__(self, nodes: List[str], vnodes: int = 64):
+        self.nodes = list(nodes)
+        points = sorted(
+            (_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes)
+        )
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        idx = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[idx]
+
+
+# ============================================================
+# Cluster
+# ============================================================
+
+class Cluster:
+    """
+    Çok node'lu çalışma modu.
+
+    - Üyelik listesi config'den gelir (CLUSTER_NODES / CLUSTER_SELF)
+    - Her node, istemci (oturum + sepet) ve OAuth key'lerinin bir bölümüne sahiptir
+    - Sahibi olmadığı key'ler için istek, bağlantı havuzlu httpx client'larla
+      sahibine iletilir (RPC ve SSE stream'leri ayrı havuzlarda)
+    - CLUSTER_NODES boşsa her şey yerel çalışır (tek node modu)
+    """
+
+    def __init__(self, nodes: List[str], self_url: str, secret: str, vnodes: int = 64,
+                 max_connections: int = 100):
+        self.enabled = bool(nodes)
+        self.self_url = self_url
+        self.secret = secret
+        self.max_connections = max_connections
+        self.ring = HashRing(nodes, vnodes)
+        # Kısa istekler (RPC, POST forward) için sınırlı havuz
+        self.client: Optional[httpx.AsyncClient] = None
+        # Uzun ömürlü SSE stream'leri için ayrı, bağlantı limiti olmayan havuz;
+        # açık stream'ler RPC havuzunu tüketmesin
+        self.stream_client: Optional[httpx.AsyncClient] = None
+
+        if self.enabled:
+            if self_url not in nodes:
+                raise ValueError("CLUSTER_SELF must be one of CLUSTER_NODES")
+            if not secret:
+                raise ValueError("CLUSTER_SECRET is required in cluster mode")
+
+    def owner(self, key: str) -> Optional[str]:
+        return self.ring.owner(key) if self.enabled else None
+
+    def is_local(self, key: str) -> bool:
+        return not self.enabled or self.owner(key) == self.self_url
+
+    # --------------------------------------------------------
+    # Yaşam döngüsü
+    # --------------------------------------------------------
+    async def start(self) -> None:
+        if not self.enabled or self.client:
+            return
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        self.client = httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(10.0))
+        # SSE stream'leri oturum boyunca açık kalır: read timeout ve bağlantı limiti yok
+        self.stream_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=20),
+            timeout=httpx.Timeout(10.0, read=None),
+        )
+        logger.info(f"Cluster mode: self={self.self_url} nodes={self.ring.nodes}")
+
+    async def stop(self) -> None:
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+        if self.stream_client:
+            await self.stream_client.aclose()
+            self.stream_client = None
+
+    # --------------------------------------------------------
+    # Node'lar arası çağrılar
+    # --------------------------------------------------------
+    def verify_internal(self, headers: Headers) -> bool:
+        """İç endpoint'lere sadece aynı secret'ı bilen node'lar erişebilir."""
+        return self.enabled and hmac.compare_digest(
+            headers.get(SECRET_HEADER, ""), self.secret
+        )
+
+    async def rpc(self, node: str, path: str, payload: Dict[str, Any]) -> Any:
+        try:
+            resp = await self.client.post(
+                f"{node}{path}",
+                json=payload,
+                headers={SECRET_HEADER: self.secret, FORWARDED_HEADER: self.self_url},
+                timeout=10.0,
+            )
+            resp.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"Cluster RPC {path} to {node} failed: {e}")
+            raise ClusterError(str(e)) from e
+        return resp.json()
+
+    async def cart_call(self, op: str, **kwargs) -> dict:
+        """
+        Sepet işlemini istemcinin sahibi olan node'da çalıştırır.
+        Middleware isteği zaten sahibine yönlendirdiği için normalde yereldir.
+        """
+        key = CLIENT_KEY.get()
+        if key is None:
+            raise RuntimeError("cart_call requires a client key (ClusterRoutingMiddleware)")
+
+        cart_id = cart_id_for(key)
+        ring_key = cart_key(cart_id)
+        if self.is_local(ring_key):
+            return CART_OPS[op](cart_id, **kwargs)
+
+        try:
+            return await self.rpc(
+                self.owner(ring_key),
+                f"/cluster/cart/{op}",
+                {"cartId": cart_id, "args": kwargs},
+            )
+        except ClusterError:
+            return {"success": False, "message": "Sepet servisine şu anda ulaşılamıyor"}
+
+    async def proxy(self, node: str, request: Request, client_key: str) -> Response:
+        """
+        İsteği olduğu gibi sahibine iletir; yanıtı (SSE dahil) stream eder.
+        Hesaplanan istemci key'i iç header ile taşınır; sahip node X-Forwarded-For'dan
+        yeniden türetmez.
+        """
+        url = f"{node}{request.url.path}"
+        if request.url.query:
+            url += f"?{request.url.query}"
+
+        headers = [
+            (k, v) for k, v in request.headers.items()
+            if k not in HOP_BY_HOP and k not in INTERNAL_HEADERS
+        ]
+        headers.append((FORWARDED_HEADER, self.self_url))
+        headers.append((SECRET_HEADER, self.secret))
+        headers.append((CLIENT_KEY_HEADER, client_key))
+
+        # GET = SSE stream (uzun ömürlü), diğerleri kısa istek
+        client = self.stream_client if request.method == "GET" else self.client
+        body = await request.body()
+        try:
+            upstream = await client.send(
+                client.build_request(request.method, url, headers=headers, content=body),
+                stream=True,
+            )
+        except httpx.HTTPError as e:
+            logger.warning(f"Cluster forward to {node} failed: {e}")
+            return JSONResponse({"error": "cluster_node_unavailable"}, status_code=502)
+
+        return StreamingResponse(
+            upstream.aiter_raw(),
+            status_code=upstream.status_code,
+            headers={k: v for k, v in upstream.headers.items() if k.lower() not in HOP_BY_HOP},
+            background=BackgroundTask(upstream.aclose),
+        )
+
+
+CLUSTER = Cluster(
+    CLUSTER_NODES,
+    CLUSTER_SELF,
+    CLUSTER_SECRET,
+    vnodes=CLUSTER_VNODES,
+    max_connections=CLUSTER_MAX_CONNECTIONS,
+)
+
+
+# ============================================================
+# MCP oturum yönlendirme middleware'i
+# ============================================================
+
+class ClusterRoutingMiddleware:
+    """
+    `prefixes` altındaki istekleri (MCP SSE + messages, sepet API'si) istemcinin
+    sahibi olan node'a yönlendirir ve istemci key'ini CLIENT_KEY'e yazar.
+    SSE yanıtlarını bozmamak için saf ASGI middleware olarak yazıldı.
+    """
+
+    def __init__(self, app, cluster: Cluster, prefixes: Tuple[str, ...] = ROUTED_PREFIXES):
+        self.app = app
+        self.cluster = cluster
+        self.prefixes = prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+
+        # Başka bir node'dan gelmişse tekrar yönlendirme (döngü olmasın) ve onun
+        # hesapladığı key'i kullan; iç header'lara sadece secret doğrulanırsa güvenilir
+        forwarded = bool(headers.get(FORWARDED_HEADER)) and self.cluster.verify_internal(headers)
+        if forwarded and headers.get(CLIENT_KEY_HEADER):
+            key = headers[CLIENT_KEY_HEADER]
+        else:
+            client_host = (scope.get("client") or ("",))[0]
+            key = session_key(headers, client_host)
+
+        ring_key = client_ring_key(key)
+        if not forwarded and not self.cluster.is_local(ring_key):
+            response = await self.cluster.proxy(self.cluster.owner(ring_key), Request(scope, receive), key)
+            await response(scope, receive, send)
+            return
+
+        token = CLIENT_KEY.set(key)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            CLIENT_KEY.reset(token)
+
+
+# ============================================================
+# İç endpoint'ler
+# ============================================================
+
+def register_cluster_routes(app: FastAPI) -> None:
+    """Node'lar arası RPC endpoint'lerini FastAPI app'ine ekler."""
+
+    @app.post("/cluster/cart/{op}", include_in_schema=False)
+    async def cluster_cart_op(op: str, request: Request):
+        if not CLUSTER.verify_internal(request.headers):
+            return JSONResponse({"error": "forbidden"}, status_code=403)
+
+        handler = CART_OPS.get(op)
+        if not handler:
+            return JSONResponse({"error": "unknown_op"}, status_code=404)
+
+        payload = await request.json()
+        cart_id = payload["cartId"]
+        # Üyelik listeleri farklıysa sepet durumu ikiye bölünmesin
+        if not CLUSTER.is_local(cart_key(cart_id)):
+            logger.warning(f"Rejecting cart op for {cart_id}: owner is {CLUSTER.owner(cart_key(cart_id))}")
+            return JSONResponse({"error": "not_owner"}, status_code=409)
+
+        return JSONResponse(handler(cart_id, **payload["args"]))
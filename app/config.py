@@ -6,4 +6,37 @@ MIME_TYPE = "text/html+skybridge"
 
 # app/config.py
 BASE_URL = "https://obasemarket.azurewebsites.net"
-RESOURCE_ID = BASE_URL
\ No newline at end of file
+RESOURCE_ID = BASE_URL
+
+# Sepet kalıcılığı (write-behind)
+# Sepetler ve MCP SSE oturumları process belleğinde tutulur; startup.txt bu yüzden
+# tek worker (-w 1) çalıştırır. Kapasite, cluster modunda node eklenerek artırılır.
+CART_DB_PATH = os.getenv("CART_DB_PATH", "cart.db")
+CART_FLUSH_INTERVAL = float(os.getenv("CART_FLUSH_INTERVAL", "0.5"))  # saniye, maksimum gecikme
+CART_FLUSH_BATCH = int(os.getenv("CART_FLUSH_BATCH", "256"))  # bu kadar kirli sepet birikince hemen yaz
+CART_WRITE_BEHIND = os.getenv("CART_WRITE_BEHIND", "1") != "0"  # 0: her mutasyonda senkron yaz
+
+# Cluster modu (CLUSTER_NODES boş bırakılırsa tek node çalışır)
+#   CLUSTER_NODES            Tüm node'ların base URL'leri, virgülle ayrılmış. Her node'da aynı liste olmalı.
+#   CLUSTER_SELF             Bu node'un CLUSTER_NODES içindeki URL'i
+#   CLUSTER_SECRET           Node'lar arası iç endpoint'ler için paylaşılan anahtar (cluster modunda zorunlu)
+#   CLUSTER_VNODES           Hash ring'de node başına sanal nokta sayısı
+#   CLUSTER_MAX_CONNECTIONS  Diğer node'lara RPC/POST havuzundaki maksimum bağlantı (SSE stream'leri ayrı, limitsiz)
+#   TRUSTED_PROXY_HOPS       Önde kaç güvenilir proxy var (ör. Azure front-end için 1). 0 ise
+#                            istemci IP'si soketten alınır ve X-Forwarded-For yok sayılır.
+# Örnek:
+#   CLUSTER_NODES="http://10.0.0.1:8000,http://10.0.0.2:8000" CLUSTER_SELF="http://10.0.0.1:8000" CLUSTER_SECRET=...
+# Her node tek worker ile çalışmalı (startup.txt: -w 1); aksi halde her worker ayrı bir
+# CARTS / TOKENS kopyası tutar. Yerel deneme: benchmarks/bench_cluster.py
+#
+# Sepet sahipliği: tüm node'lar aynı CART_DB_PATH'i (paylaşılan store) kullanır. Ring key'i
+# sepet id'sidir; açılışta her node store'dan sadece sahibi olduğu sepetleri yükler ve
+# sadece onlara yazar. Üyelik değişikliği tüm node'ların yeniden başlatılmasıyla uygulanır:
+# eski sahip kapanırken kalan değişiklikleri yazar, yeni sahip açılışta sepeti store'dan
+# alır. Node başına ayrı CART_DB_PATH kullanılırsa sahibi değişen sepetler kaybolur.
+CLUSTER_NODES = [n.strip().rstrip("/") for n in os.getenv("CLUSTER_NODES", "").split(",") if n.strip()]
+CLUSTER_SELF = os.getenv("CLUSTER_SELF", "").rstrip("/")
+CLUSTER_SECRET = os.getenv("CLUSTER_SECRET", "")
+CLUSTER_VNODES = int(os.getenv("CLUSTER_VNODES", "64"))
+CLUSTER_MAX_CONNECTIONS = int(os.getenv("CLUSTER_MAX_CONNECTIONS", "100"))  # sadece RPC/POST havuzu
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
@@ -9,6 +9,7 @@ from fastapi import FastAPI, Request, Form
 from fastapi.responses import JSONResponse, RedirectResponse, PlainTextResponse
 
 from .config import BASE_URL, RESOURCE_ID
+from .cluster import CLUSTER, ClusterError, client_ring_key, token_key
 
 # Kayıt olan client'lar (client_id → client_info)
 CLIENTS: Dict[str, Dict[str, Any]] = {}
@@ -19,6 +20,15 @@ AUTH_CODES: Dict[str, Dict[str, Any]] = {}
 # Access token store (token → token_data)
 TOKENS: Dict[str, Dict[str, Any]] = {}
 
+# Cluster modunda partition edilen store'lar (key ön eki → store).
+# Ring key'i "<kind>:<key>" şeklindedir, ör. "client:<client_id>", "code:<code>".
+# Token'lar ise o token'la gelen istemcinin (oturum + sepet) sahibinde tutulur.
+OAUTH_STORES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "client": CLIENTS,
+    "code": AUTH_CODES,
+    "token": TOKENS,
+}
+
 
 # ============================================================
 # Yardımcı fonksiyonlar
@@ -39,6 +49,44 @@ def _now() -> float:
     return time.time()
 
 
+def _ring_key(kind: str, key: str) -> str:
+    if kind == "token":
+        return client_ring_key(token_key(key))
+    return f"{kind}:{key}"
+
+
+async def _store_put(kind: str, key: str, data: Dict[str, Any]) -> None:
+    """Kaydı sahibi olan node'a yazar (cluster kapalıysa yerel store)."""
+    ring_key = _ring_key(kind, key)
+    if CLUSTER.is_local(ring_key):
+        OAUTH_STORES[kind][key] = data
+        return
+
+    await CLUSTER.rpc(
+        CLUSTER.owner(ring_key),
+        "/cluster/oauth/put",
+        {"kind": kind, "key": key, "data": data},
+    )
+
+
+async def _store_get(kind: str, key: Optional[str], pop: bool = False) -> Optional[Dict[str, Any]]:
+    """Kaydı sahibi olan node'dan okur; `pop=True` ise okuduktan sonra siler."""
+    if not key:
+        return None
+
+    ring_key = _ring_key(kind, key)
+    if CLUSTER.is_local(ring_key):
+        store = OAUTH_STORES[kind]
+        return store.pop(key, None) if pop else store.get(key)
+
+    resp = await CLUSTER.rpc(
+        CLUSTER.owner(ring_key),
+        "/cluster/oauth/get",
+        {"kind": kind, "key": key, "pop": pop},
+    )
+    return resp.get("data")
+
+
 # ============================================================
 # Token doğrulayıcı (MCP tarafında kullanılacak)
 # ============================================================
@@ -150,12 +198,12 @@ def register_oauth_routes(app: FastAPI) -> None:
         client_id = uuid.uuid4().hex
         client_secret = uuid.uuid4().hex
 
-        CLIENTS[client_id] = {
+        await _store_put("client", client_id, {
             "client_id": client_id,
             "client_secret": client_secret,
             "redirect_uris": redirect_uris,
             "client_name": client_name,
-        }
+        })
 
         return JSONResponse(
             {
@@ -190,7 +238,7 @@ def register_oauth_routes(app: FastAPI) -> None:
         code_challenge_method = qp.get("code_challenge_method")
 
         # 1) client id kontrolü
-        client_info = CLIENTS.get(client_id or "")
+        client_info = await _store_get("client", client_id)
         if not client_id or not client_info:
             return PlainTextResponse("invalid client_id", status_code=400)
 
@@ -202,7 +250,7 @@ def register_oauth_routes(app: FastAPI) -> None:
 
         # 3) Authorization code üret ve sakla
         code = _b64url_random()
-        AUTH_CODES[code] = {
+        await _store_put("code", code, {
             "client_id": client_id,
             "redirect_uri": redirect_uri,
             "resource": resource or RESOURCE_ID,
@@ -211,7 +259,7 @@ def register_oauth_routes(app: FastAPI) -> None:
             "code_challenge_method": code_challenge_method,
             "created_at": _now(),
             "expires_at": _now() + 300,  # 5 dakika
-        }
+        })
 
         # 4) Kullanıcı onayı simüle: direkt redirect ile code döndür
         redirect_with_code = f"{redirect_uri}?code={code}"
@@ -244,12 +292,12 @@ def register_oauth_routes(app: FastAPI) -> None:
         # ----------------------------------------------------
         if grant_type == "authorization_code":
             # Client doğrulaması
-            client_info = CLIENTS.get(client_id or "")
+            client_info = await _store_get("client", client_id)
             if not client_info or client_info.get("client_secret") != client_secret:
                 return JSONResponse({"error": "invalid_client"}, status_code=401)
 
             # Code doğrulaması
-            auth_data = AUTH_CODES.pop(code, None)
+            auth_data = await _store_get("code", code, pop=True)
             if not auth_data:
                 return JSONResponse({"error": "invalid_grant"}, status_code=400)
 
@@ -290,7 +338,7 @@ def register_oauth_routes(app: FastAPI) -> None:
                 "created_at": _now(),
                 "expires_at": _now() + expires_in,
             }
-            TOKENS[access_token] = token_data
+            await _store_put("token", access_token, token_data)
 
             return JSONResponse(
                 {
@@ -305,7 +353,7 @@ def register_oauth_routes(app: FastAPI) -> None:
         # Client Credentials Flow (isteğe bağlı)
         # ----------------------------------------------------
         elif grant_type == "client_credentials":
-            client_info = CLIENTS.get(client_id or "")
+            client_info = await _store_get("client", client_id)
             if not client_info or client_info.get("client_secret") != client_secret:
                 return JSONResponse({"error": "invalid_client"}, status_code=401)
 
@@ -319,7 +367,7 @@ def register_oauth_routes(app: FastAPI) -> None:
                 "created_at": _now(),
                 "expires_at": _now() + expires_in,
             }
-            TOKENS[access_token] = token_data
+            await _store_put("token", access_token, token_data)
 
             return JSONResponse(
                 {
@@ -334,3 +382,51 @@ def register_oauth_routes(app: FastAPI) -> None:
         # Desteklenmeyen grant_type
         # ----------------------------------------------------
         return JSONResponse({"error": "unsupported_grant_type"}, status_code=400)
+
+    # --------------------------------------------------------
+    # 5) Cluster içi OAuth store erişimi (sadece node'lar arası)
+    # --------------------------------------------------------
+    async def _internal_store_request(request: Request):
+        if not CLUSTER.verify_internal(request.headers):
+            return None, JSONResponse({"error": "forbidden"}, status_code=403)
+
+        payload = await request.json()
+        if payload.get("kind") not in OAUTH_STORES:
+            return None, JSONResponse({"error": "unknown_store"}, status_code=404)
+
+        if not CLUSTER.is_local(_ring_key(payload["kind"], payload["key"])):
+            return None, JSONResponse({"error": "not_owner"}, status_code=409)
+
+        return payload, None
+
+    @app.post("/cluster/oauth/put", include_in_schema=False)
+    async def cluster_oauth_put(request: Request):
+        payload, error = await _internal_store_request(request)
+        if error:
+            return error
+
+        OAUTH_STORES[payload["kind"]][payload["key"]] = payload["data"]
+        return JSONResponse({"success": True})
+
+    @app.post("/cluster/oauth/get", include_in_schema=False)
+    async def cluster_oauth_get(request: Request):
+        payload, error = await _internal_store_request(request)
+        if error:
+            return error
+
+        store = OAUTH_STORES[payload["kind"]]
+        if payload.get("pop"):
+            data = store.pop(payload["key"], None)
+        else:
+            data = store.get(payload["key"])
+        return JSONResponse({"data": data})
+
+    # --------------------------------------------------------
+    # 6) Sahip node'a ulaşılamazsa OAuth server_error
+    # --------------------------------------------------------
+    @app.exception_handler(ClusterError)
+    async def cluster_error_handler(request: Request, exc: ClusterError):
+        return JSONResponse(
+            {"error": "server_error", "error_description": "cluster node unavailable"},
+            status_code=503,
+        )
@@ -0,0 +1,98 @@
+"""
+Sepet tool gecikmesi: senkron yazım vs write-behind.
+
+N adet eşzamanlı istemci (varsayılan 1000), her biri kendi sepetine `--ops` kez
+ürün ekler. Ölçülen çağrı, `add_to_cart` tool'unun çalıştırdığı yoldur:
+`CLUSTER.cart_call("add_item", ...)`.
+- sync:         CartStore(write_behind=False), her mutasyon çağrı içinde diske yazılır
+- write-behind: CartStore(write_behind=True), arka plan task'ı toplu yazar
+
+Kullanım:
+    python benchmarks/bench_cart_store.py --carts 1000 --ops 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import cart  # noqa: E402
+from app.cart_store import CartStore  # noqa: E402
+from app.catalog import CATALOG  # noqa: E402
+from app.cluster import CLIENT_KEY, CLUSTER  # noqa: E402
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _run(mode: str, carts: int, ops: int, flush_interval: float, flush_batch: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CartStore(os.path.join(tmp, "cart.db"), flush_interval, flush_batch,
+                          write_behind=(mode == "write-behind"))
+        # Tool'lar modül seviyesindeki CART_STORE / CARTS'ı kullanır
+        cart.CART_STORE = store
+        cart.CARTS.clear()
+        store.load(cart.CARTS)
+        await store.start()
+
+        latencies = []
+
+        async def client(i: int):
+            CLIENT_KEY.set(f"token:bench-{i}")
+            for n in range(ops):
+                product_id = CATALOG[n % len(CATALOG)]["id"]
+                start = time.perf_counter()
+                result = await CLUSTER.cart_call("add_item", productId=product_id)
+                latencies.append(time.perf_counter() - start)
+                assert result["success"], result
+                await asyncio.sleep(0)  # diğer istemcilere sıra ver
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(carts)))
+        wall = time.perf_counter() - wall_start
+
+        drain_start = time.perf_counter()
+        await store.stop()
+        drain = time.perf_counter() - drain_start
+
+        persisted = CartStore(store.path, flush_interval, flush_batch).load({})
+        assert persisted == cart.CARTS, "persisted state does not match memory"
+
+    ms = [v * 1000 for v in latencies]
+    return {
+        "mode": mode,
+        "calls": len(ms),
+        "p50_ms": statistics.median(ms),
+        "p99_ms": _percentile(ms, 99),
+        "max_ms": max(ms),
+        "wall_s": wall,
+        "drain_s": drain,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--carts", type=int, default=1000)
+    parser.add_argument("--ops", type=int, default=5)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    parser.add_argument("--flush-batch", type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"{args.carts} concurrent carts x {args.ops} add_item calls")
+    print(f"{'mode':<14}{'calls':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'wall s':>9}{'drain s':>9}")
+    for mode in ("sync", "write-behind"):
+        r = asyncio.run(_run(mode, args.carts, args.ops, args.flush_interval, args.flush_batch))
+        print(
+            f"{r['mode']:<14}{r['calls']:>8}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+            f"{r['max_ms']:>10.3f}{r['wall_s']:>9.2f}{r['drain_s']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Cluster modu için çok process'li deneme ve throughput ölçümü.
+
+Her node sayısı için localhost'ta N adet `uvicorn main:app` process'i CLUSTER_*
+ayarlarıyla başlatılır. İstemciler MCP SSE üzerinden bağlanır (her istemcinin kendi
+bearer token'ı var) ve load balancer gibi node'lara sırayla dağıtılır; sahibi
+olmayan node'a düşen oturumlar cluster tarafından sahibine iletilir.
+
+Kullanım:
+    python benchmarks/bench_cluster.py --nodes 1,2,3 --clients 60 --calls 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.cluster import HashRing, session_key  # noqa: E402
+from starlette.datastructures import Headers  # noqa: E402
+
+SECRET = "bench-secret"
+
+
+def start_nodes(count: int, base_port: int, app: str, workdir: str):
+    urls = [f"http://127.0.0.1:{base_port + i}" for i in range(count)]
+    procs = []
+    for i, url in enumerate(urls):
+        env = dict(
+            os.environ,
+            CLUSTER_NODES=",".join(urls),
+            CLUSTER_SELF=url,
+            CLUSTER_SECRET=SECRET,
+            # Paylaşılan store: her node sadece sahibi olduğu sepetleri yükler
+            CART_DB_PATH=os.path.join(workdir, "carts.db"),
+        )
+        log = open(os.path.join(workdir, f"node{i}.log"), "w")
+        procs.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", app, "--port", str(base_port + i), "--log-level", "warning"],
+            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+        ))
+    return urls, procs
+
+
+def wait_ready(urls, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    for url in urls:
+        while True:
+            try:
+                if httpx.get(f"{url}/__routes__", timeout=1.0).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.time() > deadline:
+                raise RuntimeError(f"{url} did not start")
+            time.sleep(0.2)
+
+
+def stop_nodes(procs):
+    for p in procs:
+        p.terminate()
+    for p in procs:
+        p.wait(timeout=10)
+
+
+async def run_client(entry: str, token: str, calls: int, latencies: list):
+    headers = {"Authorization": f"Bearer {token}"}
+    async with sse_client(f"{entry}/mcp/sse", headers=headers) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for _ in range(calls):
+                start = time.perf_counter()
+                await session.call_tool("add_to_cart", {"productId": "p1"})
+                latencies.append(time.perf_counter() - start)
+
+            # Her istemcinin kendi sepeti olmalı: toplam adet = kendi çağrı sayısı
+            result = await session.call_tool("get_cart", {})
+            quantity = json.loads(result.content[0].text)["cart"]["totalQuantity"]
+            if quantity != calls:
+                raise AssertionError(f"{token}: expected {calls} items, got {quantity}")
+
+
+async def run_load(urls, clients: int, calls: int) -> dict:
+    ring = HashRing(urls)
+    latencies = []
+    tasks = []
+    forwarded = 0
+    for i in range(clients):
+        token = f"bench-{len(urls)}-{i}"
+        entry = urls[i % len(urls)]  # round-robin load balancer
+        key = session_key(Headers(headers={"authorization": f"Bearer {token}"}))
+        forwarded += ring.owner(key) != entry
+        tasks.append(run_client(entry, token, calls, latencies))
+
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - start
+
+    ms = sorted(v * 1000 for v in latencies)
+    return {
+        "calls": len(ms),
+        "throughput": len(ms) / wall,
+        "p50_ms": statistics.median(ms),
+        "p99_ms": ms[min(len(ms) - 1, int(len(ms) * 0.99))],
+        "forwarded": forwarded / clients,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", default="1,2,3", help="virgülle ayrılmış node sayıları")
+    parser.add_argument("--clients", type=int, default=60)
+    parser.add_argument("--calls", type=int, default=20, help="istemci başına add_to_cart çağrısı")
+    parser.add_argument("--base-port", type=int, default=9100)
+    parser.add_argument("--app", default="main:app")
+    args = parser.parse_args()
+
+    print(f"{args.clients} MCP clients x {args.calls} add_to_cart calls")
+    print(f"{'nodes':<7}{'calls':>7}{'calls/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'forwarded':>11}")
+    for count in (int(n) for n in args.nodes.split(",")):
+        with tempfile.TemporaryDirectory() as workdir:
+            urls, procs = start_nodes(count, args.base_port, args.app, workdir)
+            try:
+                wait_ready(urls)
+                r = asyncio.run(run_load(urls, args.clients, args.calls))
+            finally:
+                stop_nodes(procs)
+        print(
+            f"{count:<7}{r['calls']:>7}{r['throughput']:>10.1f}{r['p50_ms']:>9.2f}"
+            f"{r['p99_ms']:>9.2f}{r['forwarded']:>10.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,14 @@ from mcp.server.auth.settings import AuthSettings
 
 import logging
 import time
+from contextlib import asynccontextmanager
 
 from app.mcp_handlers import register_mcp
 from app.oauth import register_oauth_routes, CustomTokenVerifier
 from app.config import BASE_URL
+from app.cart import CARTS
+from app.cart_store import CART_STORE
+from app.cluster import CLUSTER, ClusterRoutingMiddleware, register_cluster_routes, cart_key
 
 # ======================================================
 # Logging
@@ -19,18 +23,38 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ======================================================
+# Sepet kalıcılığı (write-behind)
+# ======================================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Crash sonrası son kaydedilmiş sepetleri geri yükle (cluster modunda sadece bu node'unkiler)
+    CART_STORE.load(CARTS, owns=lambda cart_id: CLUSTER.is_local(cart_key(cart_id)))
+    await CART_STORE.start()
+    logger.info(f"Cart store ready: {CART_STORE.path}")
+    await CLUSTER.start()
+    try:
+        yield
+    finally:
+        await CLUSTER.stop()
+        await CART_STORE.stop()
+
 # ======================================================
 # FastAPI root app
 # ======================================================
-app = FastAPI(title="Ecommerce MCP Server")
+app = FastAPI(title="Ecommerce MCP Server", lifespan=lifespan)
 
 register_oauth_routes(app)
 
+# Cluster modu: MCP oturumlarını sahibi olan node'a yönlendir
+app.add_middleware(ClusterRoutingMiddleware, cluster=CLUSTER)
+register_cluster_routes(app)
+
 mcp = FastMCP(name="ecommerce-mcp")
 
 # Tool kayıtları
 register_mcp(mcp)
-sse_app = mcp.create_sse_app()
+sse_app = mcp.sse_app()
 
 
 app.mount("/mcp", sse_app)
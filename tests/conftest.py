@@ -0,0 +1,28 @@
+import pytest
+
+# Bağlantı reddedilen (çalışmayan) bir port
+DEAD_NODE = "http://127.0.0.1:9"
+
+
+def _find_key(cluster, ring_key, local):
+    return next(
+        k for k in (f"id-{i}" for i in range(1000))
+        if cluster.is_local(ring_key(k)) == local
+    )
+
+
+@pytest.fixture
+def dead_node():
+    return DEAD_NODE
+
+
+@pytest.fixture
+def foreign_key():
+    """`cluster`'da bu node'un sahibi olmadığı bir key; `ring_key` key'i ring key'ine çevirir."""
+    return lambda cluster, ring_key: _find_key(cluster, ring_key, local=False)
+
+
+@pytest.fixture
+def local_key():
+    """`cluster`'da bu node'un sahibi olduğu bir key."""
+    return lambda cluster, ring_key: _find_key(cluster, ring_key, local=True)
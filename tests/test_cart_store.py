@@ -0,0 +1,208 @@
+import asyncio
+import sqlite3
+import time
+
+from app.cart_store import CartStore
+
+
+def _store(tmp_path, flush_interval=60.0, flush_batch=256):
+    return CartStore(str(tmp_path / "cart.db"), flush_interval, flush_batch)
+
+
+def _rows(store):
+    conn = sqlite3.connect(store.path)
+    try:
+        return conn.execute("SELECT cart_id, items, version FROM carts ORDER BY cart_id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_load_flush_round_trip(tmp_path):
+    async def run():
+        store = _store(tmp_path)
+        carts = store.load({})
+        carts["a"] = {"p1": 2}
+        carts["b"] = {"p3": 1}
+        store.mark_dirty("a")
+        store.mark_dirty("b")
+        await store.flush()
+
+    asyncio.run(run())
+
+    restored = _store(tmp_path).load({})
+    assert restored == {"a": {"p1": 2}, "b": {"p3": 1}}
+
+
+def test_load_updates_existing_cart_in_place(tmp_path):
+    async def run():
+        store = _store(tmp_path)
+        carts = store.load({})
+        carts["a"] = {"p1": 1}
+        store.mark_dirty("a")
+        await store.flush()
+
+    asyncio.run(run())
+
+    cart = {}
+    carts = _store(tmp_path).load({"a": cart})
+    assert carts["a"] is cart
+    assert cart == {"p1": 1}
+
+
+def test_mutations_are_coalesced_per_cart(tmp_path):
+    writes = []
+
+    async def run():
+        store = _store(tmp_path)
+        original = store._write_batch
+        store._write_batch = lambda batch: (writes.append(batch), original(batch))
+        carts = store.load({})
+        carts["a"] = {}
+        for qty in range(1, 6):
+            carts["a"]["p1"] = qty
+            store.mark_dirty("a")
+        await store.flush()
+        return store
+
+    store = asyncio.run(run())
+
+    assert len(writes) == 1
+    assert writes[0] == {"a": ({"p1": 5}, 5)}
+    assert _rows(store) == [("a", '{"p1": 5}', 5)]
+
+
+def test_batch_size_wakes_flusher_before_interval(tmp_path):
+    async def run():
+        store = _store(tmp_path, flush_interval=60.0, flush_batch=3)
+        carts = store.load({})
+        await store.start()
+        for cart_id in ("a", "b", "c"):
+            carts[cart_id] = {"p1": 1}
+            store.mark_dirty(cart_id)
+        for _ in range(100):
+            if len(_rows(store)) == 3:
+                break
+            await asyncio.sleep(0.01)
+        rows = _rows(store)
+        await store.stop()
+        return rows
+
+    assert len(asyncio.run(run())) == 3
+
+
+def test_failed_write_is_requeued(tmp_path):
+    async def run():
+        store = _store(tmp_path)
+        original = store._write_batch
+        calls = []
+
+        def failing_once(batch):
+            calls.append(batch)
+            if len(calls) == 1:
+                raise sqlite3.OperationalError("disk I/O error")
+            original(batch)
+
+        store._write_batch = failing_once
+        carts = store.load({})
+        carts["a"] = {"p2": 1}
+        store.mark_dirty("a")
+
+        await store.flush()
+        assert store._dirty == {"a"}
+        assert _rows(store) == []
+
+        await store.flush()
+        assert store._dirty == set()
+        return store
+
+    store = asyncio.run(run())
+    assert _rows(store) == [("a", '{"p2": 1}', 1)]
+
+
+def test_older_snapshot_does_not_overwrite_newer(tmp_path):
+    store = _store(tmp_path)
+    store.load({})
+    store._write_batch({"a": ({"p1": 2}, 2)})
+    store._write_batch({"a": ({"p1": 1}, 1)})
+    assert _rows(store) == [("a", '{"p1": 2}', 2)]
+
+
+def test_stop_waits_for_in_flight_flush(tmp_path):
+    async def run():
+        store = _store(tmp_path, flush_interval=0.01)
+        original = store._write_batch
+
+        def slow_write(batch):
+            time.sleep(0.05)
+            original(batch)
+
+        store._write_batch = slow_write
+        carts = store.load({})
+        await store.start()
+        carts["a"] = {"p1": 1}
+        store.mark_dirty("a")
+        await asyncio.sleep(0.02)  # flusher yazıma başladı
+        carts["a"]["p1"] = 2
+        store.mark_dirty("a")
+        await store.stop()
+        return store
+
+    store = asyncio.run(run())
+    assert _rows(store) == [("a", '{"p1": 2}', 2)]
+
+
+def test_sync_mode_writes_inside_mark_dirty(tmp_path):
+    store = CartStore(str(tmp_path / "cart.db"), 60.0, 256, write_behind=False)
+    carts = store.load({})
+    carts["a"] = {"p1": 1}
+    store.mark_dirty("a")
+    assert _rows(store) == [("a", '{"p1": 1}', 1)]
+    assert store._dirty == set()
+    asyncio.run(store.stop())
+
+
+def test_flushes_reuse_one_connection(tmp_path):
+    async def run():
+        store = _store(tmp_path)
+        carts = store.load({})
+        carts["a"] = {"p1": 1}
+        store.mark_dirty("a")
+        await store.flush()
+        conn = store._conn
+        carts["a"]["p1"] = 2
+        store.mark_dirty("a")
+        await store.flush()
+        assert store._conn is conn
+        await store.stop()
+        assert store._conn is None
+        return store
+
+    store = asyncio.run(run())
+    assert _rows(store) == [("a", '{"p1": 2}', 2)]
+
+
+def test_empty_carts_are_not_loaded_into_memory(tmp_path):
+    async def run():
+        store = _store(tmp_path)
+        carts = store.load({})
+        carts["a"] = {}
+        store.mark_dirty("a")
+        await store.stop()
+
+    asyncio.run(run())
+    assert _store(tmp_path).load({}) == {}
+
+
+def test_load_only_owned_carts(tmp_path):
+    async def run():
+        store = _store(tmp_path)
+        carts = store.load({})
+        for cart_id in ("a", "b", "c"):
+            carts[cart_id] = {"p1": 1}
+            store.mark_dirty(cart_id)
+        await store.stop()
+
+    asyncio.run(run())
+
+    carts = _store(tmp_path).load({}, owns=lambda cart_id: cart_id != "b")
+    assert set(carts) == {"a", "c"}
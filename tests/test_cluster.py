@@ -0,0 +1,299 @@
+import asyncio
+import socket
+import threading
+import time
+from collections import Counter
+
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.applications import Starlette
+
+import app.cluster as cluster_module
+from app.cluster import (
+    CLIENT_KEY,
+    CLIENT_KEY_HEADER,
+    FORWARDED_HEADER,
+    SECRET_HEADER,
+    Cluster,
+    ClusterRoutingMiddleware,
+    HashRing,
+    cart_id_for,
+    cart_key,
+    client_ring_key,
+    register_cluster_routes,
+    session_key,
+    token_key,
+)
+
+NODES = ["http://127.0.0.1:9001", "http://127.0.0.1:9002", "http://127.0.0.1:9003"]
+
+
+def _token_ring_key(token):
+    return client_ring_key(token_key(token))
+
+
+def _keys(n=10000):
+    return [f"token:key-{i}" for i in range(n)]
+
+
+def test_ring_spreads_keys_across_nodes():
+    ring = HashRing(NODES, vnodes=64)
+    counts = Counter(ring.owner(k) for k in _keys())
+    assert set(counts) == set(NODES)
+    fair = 10000 / len(NODES)
+    for node in NODES:
+        assert abs(counts[node] - fair) < fair * 0.25
+
+
+def test_adding_node_only_moves_keys_to_new_node():
+    before = HashRing(NODES, vnodes=64)
+    new_node = "http://127.0.0.1:9004"
+    after = HashRing(NODES + [new_node], vnodes=64)
+
+    moved = [k for k in _keys() if before.owner(k) != after.owner(k)]
+    assert all(after.owner(k) == new_node for k in moved)
+    # ~1/4 of the keys should move to the fourth node
+    assert 0.15 < len(moved) / 10000 < 0.35
+
+
+def test_ring_owner_is_stable_and_empty_ring_has_no_owner():
+    ring = HashRing(NODES)
+    assert ring.owner("cart:x") == HashRing(list(NODES)).owner("cart:x")
+    assert HashRing([]).owner("cart:x") is None
+
+
+def test_session_key_prefers_bearer_token():
+    headers = Headers(headers={"authorization": "Bearer abc", "x-forwarded-for": "1.2.3.4"})
+    assert session_key(headers, "10.0.0.1") == "token:abc"
+
+
+def test_session_key_ignores_forwarded_for_without_trusted_proxies():
+    headers = Headers(headers={"x-forwarded-for": "1.2.3.4"})
+    assert session_key(headers, "10.0.0.1", trusted_hops=0) == "ip:10.0.0.1"
+
+
+def test_session_key_uses_last_trusted_hop():
+    # İstemci "1.2.3.4" yazdı, güvenilir proxy gerçek adresi (5.6.7.8) ekledi
+    headers = Headers(headers={"x-forwarded-for": "1.2.3.4, 5.6.7.8"})
+    assert session_key(headers, "10.0.0.1", trusted_hops=1) == "ip:5.6.7.8"
+    assert session_key(Headers(headers={}), "10.0.0.1", trusted_hops=1) == "ip:10.0.0.1"
+
+
+def test_cart_id_does_not_leak_token():
+    cart_id = cart_id_for("token:secret-token")
+    assert "secret-token" not in cart_id
+    assert cart_id == cart_id_for("token:secret-token")
+    assert client_ring_key("token:secret-token") == cart_key(cart_id)
+
+
+def test_verify_internal():
+    enabled = Cluster(NODES, NODES[0], "s3cret")
+    assert enabled.verify_internal(Headers(headers={SECRET_HEADER: "s3cret"}))
+    assert not enabled.verify_internal(Headers(headers={SECRET_HEADER: "wrong"}))
+    assert not enabled.verify_internal(Headers(headers={}))
+
+    disabled = Cluster([], "", "")
+    assert not disabled.verify_internal(Headers(headers={SECRET_HEADER: ""}))
+
+
+def _routed_app(cluster):
+    app = FastAPI()
+    app.add_middleware(ClusterRoutingMiddleware, cluster=cluster)
+
+    @app.get("/mcp/whoami")
+    async def whoami():
+        return {"key": CLIENT_KEY.get()}
+
+    return app
+
+
+def test_middleware_serves_local_keys_and_sets_client_key():
+    cluster = Cluster([], "", "")
+    with TestClient(_routed_app(cluster)) as client:
+        resp = client.get("/mcp/whoami", headers={"authorization": "Bearer abc"})
+    assert resp.json() == {"key": "token:abc"}
+
+
+def test_spoofed_forwarded_for_does_not_change_client_key():
+    cluster = Cluster([], "", "")
+    with TestClient(_routed_app(cluster)) as client:
+        plain = client.get("/mcp/whoami").json()
+        spoofed = client.get("/mcp/whoami", headers={"x-forwarded-for": "203.0.113.7"}).json()
+    assert plain == spoofed == {"key": "ip:testclient"}
+
+
+def test_client_key_header_requires_secret():
+    cluster = Cluster([NODES[0]], NODES[0], "s3cret")
+    with TestClient(_routed_app(cluster)) as client:
+        spoofed = client.get("/mcp/whoami", headers={
+            FORWARDED_HEADER: NODES[1],
+            CLIENT_KEY_HEADER: "token:victim",
+        }).json()
+        trusted = client.get("/mcp/whoami", headers={
+            FORWARDED_HEADER: NODES[1],
+            CLIENT_KEY_HEADER: "token:victim",
+            SECRET_HEADER: "s3cret",
+        }).json()
+    assert spoofed == {"key": "ip:testclient"}
+    assert trusted == {"key": "token:victim"}
+
+
+def test_middleware_ignores_forwarded_header_without_secret(dead_node, foreign_key):
+    cluster = Cluster([NODES[0], dead_node], NODES[0], "s3cret")
+    token = foreign_key(cluster, _token_ring_key)
+
+    async def run():
+        await cluster.start()
+        try:
+            with TestClient(_routed_app(cluster)) as client:
+                spoofed = client.get("/mcp/whoami", headers={
+                    "authorization": f"Bearer {token}",
+                    FORWARDED_HEADER: "evil",
+                })
+                trusted = client.get("/mcp/whoami", headers={
+                    "authorization": f"Bearer {token}",
+                    FORWARDED_HEADER: dead_node,
+                    SECRET_HEADER: "s3cret",
+                })
+        finally:
+            await cluster.stop()
+        return spoofed, trusted
+
+    spoofed, trusted = asyncio.run(run())
+    # Sahte header yönlendirmeyi atlatamaz: sahip node'a gitmeye çalışır (ve ulaşamaz)
+    assert spoofed.status_code == 502
+    assert trusted.json() == {"key": f"token:{token}"}
+
+
+def test_cart_call_returns_error_when_owner_is_down(dead_node, foreign_key):
+    cluster = Cluster([NODES[0], dead_node], NODES[0], "s3cret")
+    token = foreign_key(cluster, _token_ring_key)
+
+    async def run():
+        await cluster.start()
+        ctx = CLIENT_KEY.set(f"token:{token}")
+        try:
+            return await cluster.cart_call("get_cart")
+        finally:
+            CLIENT_KEY.reset(ctx)
+            await cluster.stop()
+
+    assert asyncio.run(run()) == {"success": False, "message": "Sepet servisine şu anda ulaşılamıyor"}
+
+
+def test_cart_call_requires_client_key():
+    with pytest.raises(RuntimeError):
+        asyncio.run(Cluster([], "", "").cart_call("get_cart"))
+
+
+def test_cluster_cart_op_requires_secret_and_ownership(monkeypatch, local_key, foreign_key):
+    cluster = Cluster(NODES, NODES[0], "s3cret")
+    monkeypatch.setattr(cluster_module, "CLUSTER", cluster)
+    app = FastAPI()
+    register_cluster_routes(app)
+
+    local_cart = local_key(cluster, cart_key)
+    foreign_cart = foreign_key(cluster, cart_key)
+    auth = {SECRET_HEADER: "s3cret"}
+
+    with TestClient(app) as client:
+        assert client.post("/cluster/cart/get_cart", json={"cartId": local_cart, "args": {}}).status_code == 403
+        assert client.post(
+            "/cluster/cart/get_cart", json={"cartId": foreign_cart, "args": {}}, headers=auth
+        ).status_code == 409
+
+        resp = client.post("/cluster/cart/get_cart", json={"cartId": local_cart, "args": {}}, headers=auth)
+        assert resp.status_code == 200
+        assert resp.json()["isEmpty"] is True
+
+
+# ------------------------------------------------------------
+# Açık SSE stream'leri RPC havuzunu tüketmemeli
+# ------------------------------------------------------------
+
+@pytest.fixture
+def upstream_node():
+    """Sonsuz SSE stream'i ve kısa bir RPC endpoint'i sunan gerçek bir uvicorn node'u."""
+
+    async def stream(request):
+        async def events():
+            while True:
+                yield b"data: ping\n\n"
+                await asyncio.sleep(0.2)
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def ping(request):
+        return JSONResponse({"ok": True})
+
+    app = Starlette(routes=[
+        Route("/mcp/stream", stream),
+        Route("/cluster/ping", ping, methods=["POST"]),
+    ])
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(
+        app, host="127.0.0.1", port=port, log_level="error", timeout_graceful_shutdown=1,
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    yield f"http://127.0.0.1:{port}"
+
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+def _stream_request():
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/mcp/stream",
+        "raw_path": b"/mcp/stream",
+        "query_string": b"",
+        "root_path": "",
+        "scheme": "http",
+        "http_version": "1.1",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    return Request(scope, receive)
+
+
+def test_open_streams_do_not_exhaust_rpc_pool(upstream_node):
+    cluster = Cluster([NODES[0], upstream_node], NODES[0], "s3cret", max_connections=2)
+
+    async def run():
+        await cluster.start()
+        streams = []
+        try:
+            # Limitten fazla stream aç; hepsi beklemeden açılmalı
+            for i in range(5):
+                resp = await asyncio.wait_for(
+                    cluster.proxy(upstream_node, _stream_request(), f"token:s{i}"), timeout=5
+                )
+                assert resp.status_code == 200
+                streams.append(resp)
+
+            return await asyncio.wait_for(cluster.rpc(upstream_node, "/cluster/ping", {}), timeout=5)
+        finally:
+            for resp in streams:
+                await resp.background()
+            await cluster.stop()
+
+    assert asyncio.run(run()) == {"ok": True}
@@ -0,0 +1,59 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app.oauth as oauth_module
+from app.cluster import SECRET_HEADER, Cluster
+from app.oauth import register_oauth_routes
+
+NODES = ["http://127.0.0.1:9001", "http://127.0.0.1:9002"]
+
+
+def _app(monkeypatch, cluster):
+    monkeypatch.setattr(oauth_module, "CLUSTER", cluster)
+    app = FastAPI()
+    register_oauth_routes(app)
+    return app
+
+
+def test_token_endpoint_returns_server_error_when_owner_is_down(monkeypatch, dead_node, foreign_key):
+    cluster = Cluster([NODES[0], dead_node], NODES[0], "s3cret")
+    app = _app(monkeypatch, cluster)
+    client_id = foreign_key(cluster, lambda k: f"client:{k}")
+
+    async def run():
+        await cluster.start()
+        try:
+            with TestClient(app) as client:
+                return client.post("/oauth/token", data={
+                    "grant_type": "client_credentials",
+                    "client_id": client_id,
+                    "client_secret": "x",
+                })
+        finally:
+            await cluster.stop()
+
+    resp = asyncio.run(run())
+    assert resp.status_code == 503
+    assert resp.json()["error"] == "server_error"
+
+
+def test_internal_store_requires_secret_and_ownership(monkeypatch, local_key, foreign_key):
+    cluster = Cluster(NODES, NODES[0], "s3cret")
+    app = _app(monkeypatch, cluster)
+    auth = {SECRET_HEADER: "s3cret"}
+    local_code = local_key(cluster, lambda k: f"code:{k}")
+    foreign_code = foreign_key(cluster, lambda k: f"code:{k}")
+
+    with TestClient(app) as client:
+        body = {"kind": "code", "key": local_code, "data": {"client_id": "c"}}
+        assert client.post("/cluster/oauth/put", json=body).status_code == 403
+        assert client.post("/cluster/oauth/put", json={**body, "key": foreign_code}, headers=auth).status_code == 409
+        assert client.post("/cluster/oauth/put", json={**body, "kind": "nope"}, headers=auth).status_code == 404
+
+        assert client.post("/cluster/oauth/put", json=body, headers=auth).json() == {"success": True}
+        get = {"kind": "code", "key": local_code, "pop": True}
+        assert client.post("/cluster/oauth/get", json=get, headers=auth).json() == {"data": {"client_id": "c"}}
+        # Code tek kullanımlık: pop sonrası yok
+        assert client.post("/cluster/oauth/get", json=get, headers=auth).json() == {"data": None}